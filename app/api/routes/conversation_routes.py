@@ -1,3 +1,5 @@
+from typing import Optional
+from uuid import UUID
 from fastapi import APIRouter, Depends, Query, Path
 
 from app.controllers.conversation_controller import ConversationController
@@ -11,8 +13,8 @@ router = APIRouter(prefix="/api/conversations", tags=["Conversations"])
 @router.get("/user/{user_id}", response_model=PaginatedConversationResponse)
 async def get_user_conversations(
     user_id: int = Path(..., description="ID of the user"),
-    page: int = Query(1, description="Page number"),
-    limit: int = Query(20, description="Number of conversations per page"),
+    cursor: Optional[str] = Query(None, description="Cursor: next_cursor of the previous page"),
+    limit: int = Query(20, ge=1, le=100, description="Number of conversations per page"),
     conversation_controller: ConversationController = Depends()
 ) -> PaginatedConversationResponse:
     """
@@ -20,13 +22,13 @@ async def get_user_conversations(
     """
     return await conversation_controller.get_user_conversations(
         user_id=user_id,
-        page=page,
+        cursor=cursor,
         limit=limit
     )
 
 @router.get("/{conversation_id}", response_model=ConversationResponse)
 async def get_conversation(
-    conversation_id: int = Path(..., description="ID of the conversation"),
+    conversation_id: UUID = Path(..., description="ID of the conversation"),
     conversation_controller: ConversationController = Depends()
 ) -> ConversationResponse:
     """
@@ -1,4 +1,7 @@
+from typing import Optional
+from uuid import UUID
 from fastapi import HTTPException, status
+from app.controllers.cursor import decode_cursor, encode_cursor
 from app.models.cassandra_models import ConversationModel
 from app.schemas.conversation import ConversationResponse, PaginatedConversationResponse
 import logging
@@ -12,7 +15,7 @@ class ConversationController:
     async def get_user_conversations(
         self, 
         user_id: int, 
-        page: int = 1, 
+        cursor: Optional[str] = None, 
         limit: int = 20
     ) -> PaginatedConversationResponse:
         """
@@ -20,25 +23,30 @@ class ConversationController:
  
         Args:
             user_id: ID of the user
-            page: Page number
+            cursor: Cursor returned as next_cursor with the previous page
             limit: Number of conversations per page
  
         Returns:
             Paginated list of conversations
  
         Raises:
-            HTTPException: If user not found or access denied
+            HTTPException: If the cursor is invalid, user not found or access denied
         """
         try:
-            # Fetch conversations and total count from the model
-            conversations, total = await ConversationModel.get_user_conversations(user_id, page, limit)
+            before = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        try:
+            # Fetch conversations, total count and the key to seek past for the next page
+            conversations, total, next_key = await ConversationModel.get_user_conversations(user_id, before, limit)
  
             # Construct the paginated response
             return PaginatedConversationResponse(
                 total=total,
-                page=page,
+                next_cursor=encode_cursor(*next_key) if next_key else None,
                 limit=limit,
-                data=[ConversationResponse(**conv) for conv in conversations]
+                data=conversations
             )
         except Exception as e:
             raise HTTPException(
@@ -46,7 +54,7 @@ class ConversationController:
                 detail=f"Failed to fetch user conversations: {str(e)}"
             )
  
-    async def get_conversation(self, conversation_id: int) -> ConversationResponse:
+    async def get_conversation(self, conversation_id: UUID) -> ConversationResponse:
         """
         Get a specific conversation by ID
  
@@ -63,7 +71,7 @@ class ConversationController:
             # Fetch conversation details from the model
             conversation = await ConversationModel.get_conversation(conversation_id)
  
-            logger.info(f"Conversation fetched: {conversation}")
+            logger.debug("Conversation fetched: %s", conversation_id)
             # Check if conversation exists
             if not conversation:
                 raise HTTPException(
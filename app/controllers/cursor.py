@@ -0,0 +1,49 @@
+"""
+Opaque pagination cursors.
+
+A cursor is the clustering key (timestamp, TimeUUID) of the last row of a
+page, base64 encoded so clients treat it as an opaque token.
+"""
+import base64
+import calendar
+from datetime import datetime, timedelta
+from typing import Tuple
+from uuid import UUID
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def encode_cursor(timestamp: datetime, row_id: UUID) -> str:
+    """
+    Encode the clustering key of the last row of a page as a cursor.
+
+    Args:
+        timestamp: Clustering timestamp of the row, naive UTC as returned by the driver
+        row_id: TimeUUID clustering column of the row
+
+    Returns:
+        URL-safe cursor string
+    """
+    # Cassandra timestamps have millisecond precision, keep exactly that
+    millis = calendar.timegm(timestamp.utctimetuple()) * 1000 + timestamp.microsecond // 1000
+    return base64.urlsafe_b64encode(f"{millis}:{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor string from a previous page
+
+    Returns:
+        The (timestamp, row_id) clustering key to seek past
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        millis, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return _EPOCH + timedelta(milliseconds=int(millis)), UUID(row_id)
+    except (ValueError, UnicodeError, OverflowError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
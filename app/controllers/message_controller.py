@@ -1,8 +1,11 @@
 from typing import Optional
 from datetime import datetime
+from uuid import UUID
 from fastapi import HTTPException, status
+from cassandra.util import min_uuid_from_time
 import logging
  
+from app.controllers.cursor import decode_cursor, encode_cursor
 from app.models.cassandra_models import MessageModel, ConversationModel
 from app.schemas.message import MessageCreate, MessageResponse, PaginatedMessageResponse
 logger = logging.getLogger(__name__)
@@ -32,7 +35,7 @@ class MessageController:
                 message_data.receiver_id
             )
  
-            logger.info(f"Conversation created: {conversation['conversation_id']}")
+            logger.debug("Conversation resolved: %s", conversation['conversation_id'])
             # Create message
             message = await MessageModel.create_message(
                 conversation_id=conversation['conversation_id'],
@@ -41,7 +44,7 @@ class MessageController:
                 content=message_data.content
             )
  
-            logger.info(f"Message created: {message}")
+            logger.debug("Message created: %s", message['message_id'])
  
  
             message_response = MessageResponse(
@@ -63,8 +66,8 @@ class MessageController:
  
     async def get_conversation_messages(
         self, 
-        conversation_id: int, 
-        page: int = 1, 
+        conversation_id: UUID, 
+        cursor: Optional[str] = None, 
         limit: int = 20
     ) -> PaginatedMessageResponse:
         """
@@ -72,20 +75,25 @@ class MessageController:
  
         Args:
             conversation_id: ID of the conversation
-            page: Page number
+            cursor: Cursor returned as next_cursor with the previous page
             limit: Number of messages per page
  
         Returns:
             Paginated list of messages
  
         Raises:
-            HTTPException: If conversation not found or access denied
+            HTTPException: If the cursor is invalid, conversation not found or access denied
         """
+        try:
+            before = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
         try:
             # First, check if the conversation exists
             conversation = await ConversationModel.get_conversation(conversation_id)
  
-            logger.info(f"Conversation fetched: {conversation}")
+            logger.debug("Conversation fetched: %s", conversation_id)
             # Check if conversation exists
             if not conversation:
                 raise HTTPException(
@@ -93,19 +101,19 @@ class MessageController:
                     detail=f"Conversation with ID {conversation_id} not found"
                 )
  
-            # Fetch messages and total count from the model
-            messages, total = await MessageModel.get_conversation_messages(
+            # Fetch messages, total count and the key to seek past for the next page
+            messages, total, next_key = await MessageModel.get_conversation_messages(
                 conversation_id=conversation_id,
-                page=page,
+                before=before,
                 limit=limit
             )
-            logger.info(f"Messages fetched: {messages}")
+            logger.debug("Fetched %d messages", len(messages))
             # Construct the paginated response
             return PaginatedMessageResponse(
                 total=total,
-                page=page,
+                next_cursor=encode_cursor(*next_key) if next_key else None,
                 limit=limit,
-                data=[MessageResponse(**msg) for msg in messages]
+                data=messages
             )
  
         except HTTPException:
@@ -120,9 +128,8 @@ class MessageController:
  
     async def get_messages_before_timestamp(
         self, 
-        conversation_id: int, 
+        conversation_id: UUID, 
         before_timestamp: datetime,
-        page: int = 1, 
         limit: int = 20
     ) -> PaginatedMessageResponse:
         """
@@ -131,7 +138,6 @@ class MessageController:
         Args:
             conversation_id: ID of the conversation
             before_timestamp: Get messages before this timestamp
-            page: Page number
             limit: Number of messages per page
  
         Returns:
@@ -144,7 +150,7 @@ class MessageController:
             # First, check if the conversation exists
             conversation = await ConversationModel.get_conversation(conversation_id)
  
-            logger.info(f"Conversation fetched: {conversation}")
+            logger.debug("Conversation fetched: %s", conversation_id)
  
             if not conversation:
                 raise HTTPException(
@@ -152,20 +158,19 @@ class MessageController:
                     detail=f"Conversation with ID {conversation_id} not found"
                 )
  
-            # Fetch messages before the timestamp and total count from the model
-            messages, total = await MessageModel.get_messages_before_timestamp(
+            # The smallest TimeUUID of the instant makes the seek exclude every message sent at it
+            messages, total, next_key = await MessageModel.get_conversation_messages(
                 conversation_id=conversation_id,
-                before_timestamp=before_timestamp,
-                page=page,
+                before=(before_timestamp, min_uuid_from_time(before_timestamp)),
                 limit=limit
             )
  
             # Construct the paginated response
             return PaginatedMessageResponse(
                 total=total,
-                page=page,
+                next_cursor=encode_cursor(*next_key) if next_key else None,
                 limit=limit,
-                data=[MessageResponse(**msg) for msg in messages]
+                data=messages
             )
  
         except HTTPException:
@@ -2,15 +2,17 @@
 Cassandra client for the Messenger application.
 This provides a connection to the Cassandra database.
 """
+import asyncio
 import os
 import uuid
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import logging
  
-from cassandra.cluster import Cluster, Session
+from cassandra.cluster import Cluster, ExecutionProfile, EXEC_PROFILE_DEFAULT, ResultSet, Session
 from cassandra.auth import PlainTextAuthProvider
-from cassandra.query import SimpleStatement, dict_factory
+from cassandra.policies import DCAwareRoundRobinPolicy, TokenAwarePolicy
+from cassandra.query import PreparedStatement, SimpleStatement, named_tuple_factory
  
 logger = logging.getLogger(__name__)
  
@@ -33,9 +35,11 @@ class CassandraClient:
         self.host = os.getenv("CASSANDRA_HOST", "localhost")
         self.port = int(os.getenv("CASSANDRA_PORT", "9042"))
         self.keyspace = os.getenv("CASSANDRA_KEYSPACE", "messenger")
+        self.local_dc = os.getenv("CASSANDRA_LOCAL_DC", "datacenter1")
  
         self.cluster = None
         self.session = None
+        self._prepared = {}
         self.connect()
  
         self._initialized = True
@@ -43,9 +47,21 @@ class CassandraClient:
     def connect(self) -> None:
         """Connect to the Cassandra cluster."""
         try:
-            self.cluster = Cluster([self.host], port=self.port)
+            profile = ExecutionProfile(
+                # Send each bound statement straight to a replica of its partition in the local DC
+                load_balancing_policy=TokenAwarePolicy(DCAwareRoundRobinPolicy(local_dc=self.local_dc)),
+                # Rows come back as named tuples, cheaper to build than one dict per row
+                row_factory=named_tuple_factory
+            )
+            self.cluster = Cluster(
+                [self.host],
+                port=self.port,
+                protocol_version=4,
+                execution_profiles={EXEC_PROFILE_DEFAULT: profile}
+            )
             self.session = self.cluster.connect(self.keyspace) # Change here self.keyspace
-            self.session.row_factory = dict_factory
+            # Prepared statements belong to the session they were prepared on
+            self._prepared = {}
             logger.info(f"Connected to Cassandra at {self.host}:{self.port}, keyspace: {self.keyspace}")
         except Exception as e:
             logger.error(f"Failed to connect to Cassandra: {str(e)}")
@@ -57,18 +73,72 @@ class CassandraClient:
             self.cluster.shutdown()
             logger.info("Cassandra connection closed")
  
-    async def execute(self, query: str, params: tuple = None):
+    async def execute(self, query: str, params: tuple = None) -> ResultSet:
+        """
+        Execute a CQL query without blocking the event loop.
+
+        The query is sent with the driver's execute_async and the response is
+        awaited through an asyncio future, so independent queries can be run
+        concurrently with asyncio.gather.
+
+        Args:
+            query: The CQL query string or statement
+            params: The parameters for the query
+
+        Returns:
+            ResultSet of the query
+        """
         if not self.session:
             self.connect()
- 
+
+        loop = asyncio.get_running_loop()
+        result = loop.create_future()
+
+        def on_success(rows):
+            loop.call_soon_threadsafe(_set_result, result, ResultSet(response_future, rows))
+
+        def on_error(exc):
+            loop.call_soon_threadsafe(_set_exception, result, exc)
+
         try:
-            # Use the synchronous execute method - this is fine in FastAPI
-            # as long as the database operations aren't too slow
-            return self.session.execute(query, params or ())
+            response_future = self.session.execute_async(query, params or ())
+            response_future.add_callbacks(on_success, on_error)
+            return await result
         except Exception as e:
             logger.error(f"Query execution failed: {str(e)}")
             raise
  
+    async def prepare(self, query: str, consistency_level: Optional[int] = None) -> PreparedStatement:
+        """
+        Prepare a CQL query, caching the PreparedStatement by its text.
+
+        Only the first call for a given query goes to the server; later calls
+        return the cached statement, so the query is parsed once per process.
+
+        Args:
+            query: The CQL query string, with ? bind markers
+            consistency_level: Optional consistency level to set on the statement
+
+        Returns:
+            The prepared statement, ready to pass to execute
+        """
+        if not self.session:
+            self.connect()
+
+        key = (query, consistency_level)
+        statement = self._prepared.get(key)
+        if statement is None:
+            try:
+                loop = asyncio.get_running_loop()
+                statement = await loop.run_in_executor(None, self.session.prepare, query)
+            except Exception as e:
+                logger.error(f"Query preparation failed: {str(e)}")
+                raise
+            if consistency_level is not None:
+                statement.consistency_level = consistency_level
+            self._prepared[key] = statement
+        return statement
+
     def execute_async(self, query: str, params: dict = None):
         """
         Execute a CQL query asynchronously.
@@ -96,5 +166,14 @@ class CassandraClient:
             self.connect()
         return self.session
  
+def _set_result(future: asyncio.Future, value) -> None:
+    # The awaiting request may have been cancelled while the query was in flight
+    if not future.done():
+        future.set_result(value)
+
+def _set_exception(future: asyncio.Future, exc: BaseException) -> None:
+    if not future.done():
+        future.set_exception(exc)
+ 
 # Create a global instance
 cassandra_client = CassandraClient() 
\ No newline at end of file
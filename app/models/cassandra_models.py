@@ -1,25 +1,150 @@
 """
 Models for interacting with Cassandra tables in the Facebook Messenger backend project.
 """
-from datetime import datetime
+import asyncio
+import calendar
+import itertools
+from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional, Tuple
+from uuid import UUID
 from app.db.cassandra_client import cassandra_client
+from app.schemas.conversation import ConversationResponse
+from app.schemas.message import MessageResponse
 import logging
-from cassandra.query import SimpleStatement
+from cachetools import TTLCache
+from cassandra import ConsistencyLevel
+from cassandra.query import BatchStatement, BatchType
+from cassandra.util import uuid_from_time
   
 logger = logging.getLogger(__name__)
+
+# Reads only need the closest replica in the local data center
+_READ_CONSISTENCY = ConsistencyLevel.LOCAL_ONE
+
+# Write generation of each conversation, bumped by every message sent from this process.
+# A read only caches its result if the generation is unchanged since the read started, so a
+# read in flight during a send can't overwrite the fresh entry; kept well beyond the cache TTLs.
+_write_generations: TTLCache = TTLCache(maxsize=100_000, ttl=120)
+_next_generation = itertools.count(1)
+
+# Conversation rows keyed by conversation_id. The row only changes when a message is
+# sent, which overwrites the entry in this process; other processes see it within the TTL.
+_conversation_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+
+# First pages of messages keyed by conversation_id, then by limit. Sending a message
+# drops the conversation's entry in this process; other processes see it within the TTL.
+_first_page_cache: TTLCache = TTLCache(maxsize=10_000, ttl=5)
+
+# CQL statements, prepared once per process through cassandra_client.prepare
+_INSERT_MESSAGE = """
+INSERT INTO messages (message_id, conversation_id, time_bucket, sender_id, receiver_id, content, timestamp)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+_SELECT_MESSAGES = """
+SELECT message_id, sender_id, receiver_id, content, timestamp
+FROM messages
+WHERE conversation_id = ? AND time_bucket = ?
+ORDER BY timestamp DESC
+LIMIT ?
+"""
+_SELECT_MESSAGES_BEFORE = """
+SELECT message_id, sender_id, receiver_id, content, timestamp
+FROM messages
+WHERE conversation_id = ? AND time_bucket = ? AND (timestamp, message_id) < (?, ?)
+ORDER BY timestamp DESC
+LIMIT ?
+"""
+_INSERT_MESSAGE_BUCKET = "INSERT INTO message_buckets (conversation_id, time_bucket) VALUES (?, ?)"
+_SELECT_MESSAGE_BUCKETS = "SELECT time_bucket FROM message_buckets WHERE conversation_id = ? LIMIT ?"
+_SELECT_MESSAGE_BUCKETS_BEFORE = "SELECT time_bucket FROM message_buckets WHERE conversation_id = ? AND time_bucket <= ? LIMIT ?"
+_INCREMENT_MESSAGE_COUNT = "UPDATE conversation_message_count SET msg_count = msg_count + 1 WHERE conversation_id = ?"
+_SELECT_MESSAGE_COUNT = "SELECT msg_count FROM conversation_message_count WHERE conversation_id = ?"
+
+_SELECT_CONVERSATION_LAST_TIMESTAMP = "SELECT conversation_id, last_timestamp FROM user_conversations WHERE conversation_id = ?"
+_SELECT_CONVERSATION = """
+SELECT conversation_id, sender_id, receiver_id, last_timestamp, last_message
+FROM user_conversations
+WHERE conversation_id = ?
+"""
+_INSERT_FIRST_CONVERSATION_MESSAGE = """
+INSERT INTO user_conversations (conversation_id, sender_id, receiver_id, last_timestamp, last_message)
+VALUES (?, ?, ?, ?, ?)
+IF NOT EXISTS
+"""
+_UPDATE_CONVERSATION = """
+UPDATE user_conversations SET last_timestamp = ?, last_message = ?, sender_id = ?, receiver_id = ?
+WHERE conversation_id = ?
+IF last_timestamp = ?
+"""
+
+# Compare-and-set attempts to move a conversation's last message before giving up
+_LAST_MESSAGE_ATTEMPTS = 5
+
+_INSERT_USER_CONVERSATION = """
+INSERT INTO user_conversations_by_user (user_id, last_timestamp, conversation_id, other_user_id, last_message)
+VALUES (?, ?, ?, ?, ?)
+USING TIMESTAMP ?
+"""
+_DELETE_USER_CONVERSATION = """
+DELETE FROM user_conversations_by_user USING TIMESTAMP ?
+WHERE user_id = ? AND last_timestamp = ? AND conversation_id = ?
+"""
+_SELECT_USER_CONVERSATIONS = """
+SELECT conversation_id, other_user_id, last_timestamp, last_message
+FROM user_conversations_by_user
+WHERE user_id = ?
+LIMIT ?
+"""
+_SELECT_USER_CONVERSATIONS_BEFORE = """
+SELECT conversation_id, other_user_id, last_timestamp, last_message
+FROM user_conversations_by_user
+WHERE user_id = ? AND (last_timestamp, conversation_id) < (?, ?)
+LIMIT ?
+"""
+_INCREMENT_USER_CONVERSATION_COUNT = "UPDATE user_conversation_count SET conversation_count = conversation_count + 1 WHERE user_id = ?"
+_SELECT_USER_CONVERSATION_COUNT = "SELECT conversation_count FROM user_conversation_count WHERE user_id = ?"
+
+_SELECT_CONVERSATION_BY_USERS = "SELECT conversation_id FROM conversation_by_users WHERE user_low = ? AND user_high = ?"
+_INSERT_CONVERSATION_BY_USERS = """
+INSERT INTO conversation_by_users (user_low, user_high, conversation_id)
+VALUES (?, ?, ?)
+IF NOT EXISTS
+"""
+_INSERT_CONVERSATION_PARTICIPANTS = """
+INSERT INTO conversation (conversation_id, sender_id, receiver_id, last_timestamp)
+VALUES (?, ?, ?, ?)
+"""
  
+def _utcnow() -> datetime:
+    """Current time as a naive UTC datetime, the form the driver stores and returns."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _micros(timestamp: datetime) -> int:
+    """Microseconds since the epoch of a naive UTC datetime, for USING TIMESTAMP."""
+    return calendar.timegm(timestamp.utctimetuple()) * 1_000_000 + timestamp.microsecond
+
+
+def _time_bucket(timestamp: datetime) -> int:
+    """Month partition of the messages table a timestamp falls in, as yyyymm."""
+    # Naive timestamps are UTC, as the driver stores them; aware ones are converted first
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc)
+    return timestamp.year * 100 + timestamp.month
+
+
 class MessageModel:
     """
     Message model for interacting with the messages table.
     """
  
     @staticmethod
-    async def create_message(conversation_id: int, sender_id: int, receiver_id: int, content: str) -> Dict[str, Any]:
+    async def create_message(conversation_id: UUID, sender_id: int, receiver_id: int, content: str) -> Dict[str, Any]:
         """
         Create a new message.
  
         Args:
+            conversation_id (UUID): ID of the conversation
             sender_id (int): ID of the sender
             receiver_id (int): ID of the receiver
             content (str): Content of the message
@@ -28,52 +153,61 @@ class MessageModel:
             dict: Details of the created message matching MessageResponse schema
         """ 
  
-        # Get the next message ID
-        message_id_queries = "SELECT counter_value FROM counter WHERE counter_name = 'message_id'"
-        value = await cassandra_client.execute(message_id_queries)
-        logger.info(f"Value fetched: {value}")
-        message_id = value[0]["counter_value"] + 1 if value else 1
-        logger.info(f"Message ID: {message_id}")
-        # Update the counter
-        await cassandra_client.execute(
-            "UPDATE counter SET counter_value = counter_value + 1 WHERE counter_name = 'message_id'"
-        )
- 
-        created_at = datetime.now()
- 
-        # Insert into messages table
-        queries = """
-        INSERT INTO messages (message_id, conversation_id, sender_id, receiver_id, content, timestamp)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        await cassandra_client.execute(queries, (message_id, conversation_id, sender_id, receiver_id, content, created_at))
- 
-        check_conversation_queries = """
-            select conversation_id from user_conversations where conversation_id = %s 
-            """
-        values = await cassandra_client.execute(check_conversation_queries, (conversation_id,))
-        for row in values:
-            logger.info(f"Row: {row}")
-        if not values:
-            logger.info("No existing conversation found.")
-        else:
-            for value in values:
-                logger.info(f"Checking if conversation already exists: {value}")
+        # Cassandra stores milliseconds; truncate so the value compares equal to what is read back
+        now = _utcnow()
+        created_at = now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+        # The message ID is a TimeUUID of the creation time: unique across writers, no DB round-trip
+        message_id = uuid_from_time(created_at)
+        logger.debug("Message ID: %s", message_id)
  
+        insert_message_queries = await cassandra_client.prepare(_INSERT_MESSAGE)
+        # Records that the month partition is non-empty, so reads only visit months with messages
+        insert_bucket_queries = await cassandra_client.prepare(_INSERT_MESSAGE_BUCKET)
+        # Keep the per-conversation message count up to date so reads never need COUNT(*)
+        count_queries = await cassandra_client.prepare(_INCREMENT_MESSAGE_COUNT)
+        # Starting point of the compare-and-set on the conversation's last message
+        previous_message_queries = await cassandra_client.prepare(_SELECT_CONVERSATION_LAST_TIMESTAMP)
+
+        values = await cassandra_client.execute(previous_message_queries, (conversation_id,))
         if not values:
-            # If conversation doesn't exist, create it
-            insert_queries = """
-            INSERT INTO user_conversations (conversation_id, sender_id, receiver_id, last_timestamp, last_message)
-            VALUES (%s, %s, %s, %s, %s)
-            """
-            await cassandra_client.execute(insert_queries, (conversation_id, sender_id, receiver_id, created_at, content))
-        else:
-            # If conversation exists, update it with the new message
-            update_queries = """
-            UPDATE user_conversations SET last_timestamp = %s, last_message = %s, sender_id = %s, receiver_id = %s WHERE conversation_id = %s
-            """
-            await cassandra_client.execute(update_queries, (created_at, content, sender_id, receiver_id, conversation_id))
- 
+            logger.debug("No previous message found for conversation %s", conversation_id)
+
+        moved, previous_timestamp = await MessageModel._advance_last_message(
+            conversation_id, sender_id, receiver_id, content, created_at,
+            previous_timestamp=values.one().last_timestamp if values else None
+        )
+
+        # All regular writes go in a single round-trip; they span partitions, so the batch is logged
+        batch = BatchStatement(batch_type=BatchType.LOGGED)
+        batch.add(
+            insert_message_queries,
+            (message_id, conversation_id, _time_bucket(created_at), sender_id, receiver_id, content, created_at)
+        )
+        batch.add(insert_bucket_queries, (conversation_id, _time_bucket(created_at)))
+        # Only the writer that moved the last message replaces the inbox rows of the one it replaced
+        if moved:
+            await MessageModel._add_user_inbox_updates(
+                batch, conversation_id, sender_id, receiver_id, content, created_at,
+                previous_timestamp=previous_timestamp
+            )
+        # Counter updates can't share a batch with regular writes; send it alongside, once nothing
+        # before the write can fail and leave the count ahead of the stored messages
+        await asyncio.gather(
+            cassandra_client.execute(batch),
+            cassandra_client.execute(count_queries, (conversation_id,))
+        )
+
+        _write_generations[conversation_id] = next(_next_generation)
+        _first_page_cache.pop(conversation_id, None)
+        if moved:
+            _conversation_cache[conversation_id] = {
+                "conversation_id": conversation_id,
+                "sender_id": sender_id,
+                "receiver_id": receiver_id,
+                "last_message_at": created_at,
+                "last_message_content": content
+            }
  
         return {
             "message_id": message_id,
@@ -96,112 +230,190 @@ class MessageModel:
 
 
     @staticmethod
-    async def get_conversation_messages(conversation_id: int, page: int = 1, limit: int = 20) -> Tuple[List[Dict[str, Any]], int]:
+    async def _advance_last_message(
+        conversation_id: UUID,
+        sender_id: int,
+        receiver_id: int,
+        content: str,
+        created_at: datetime,
+        previous_timestamp: Optional[datetime] = None
+    ) -> Tuple[bool, Optional[datetime]]:
         """
-        Get messages for a conversation with pagination.
- 
+        Move the conversation's user_conversations row to a new last message.
+
+        The write is a lightweight transaction on the last_timestamp that was
+        read, so concurrent senders are serialized: each previous last message
+        is replaced by exactly one writer, which then owns deleting its inbox
+        rows. On a lost race the current value is retried, unless it already
+        is a newer message, in which case the row is left alone.
+
         Args:
-            conversation_id (int): ID of the conversation
-            page (int): Page number for pagination (default: 1)
-            limit (int): Number of messages per page (default: 20)
- 
+            conversation_id (UUID): ID of the conversation
+            sender_id (int): ID of the sender
+            receiver_id (int): ID of the receiver
+            content (str): Content of the new last message
+            created_at (datetime): Timestamp of the new last message
+            previous_timestamp (datetime): last_timestamp read before the write, if any
+
         Returns:
-            tuple: (List of messages, Total count) for PaginatedMessageResponse
-        """
-        # Get total count of messages in the conversation
-        count_queries = """
-        SELECT COUNT(*) as count FROM messages WHERE conversation_id = %s
+            tuple: (Whether the row now holds this message, Timestamp of the message it replaced)
         """
-        count_results = await cassandra_client.execute(count_queries, (conversation_id,))
-        total = count_results[0]["count"] if count_results else 0
-  
-        # Get messages with pagination
-        queries = """
-        SELECT message_id, sender_id, receiver_id, content, timestamp
-        FROM messages
-        WHERE conversation_id = %s
-        ORDER BY timestamp DESC 
+        insert_queries = await cassandra_client.prepare(_INSERT_FIRST_CONVERSATION_MESSAGE)
+        update_queries = await cassandra_client.prepare(_UPDATE_CONVERSATION)
+
+        for _ in range(_LAST_MESSAGE_ATTEMPTS):
+            if previous_timestamp is not None and previous_timestamp > created_at:
+                return False, previous_timestamp
+            if previous_timestamp is None:
+                result = await cassandra_client.execute(
+                    insert_queries, (conversation_id, sender_id, receiver_id, created_at, content)
+                )
+            else:
+                result = await cassandra_client.execute(
+                    update_queries, (created_at, content, sender_id, receiver_id, conversation_id, previous_timestamp)
+                )
+            if result.was_applied:
+                return True, previous_timestamp
+            # The failed condition returns the current value; absent if the row does not exist
+            previous_timestamp = getattr(result.one(), "last_timestamp", None)
+
+        raise RuntimeError(f"Could not update the last message of conversation {conversation_id}: too much contention")
+
+    @staticmethod
+    async def _add_user_inbox_updates(
+        batch: BatchStatement,
+        conversation_id: UUID,
+        sender_id: int,
+        receiver_id: int,
+        content: str,
+        created_at: datetime,
+        previous_timestamp: Optional[datetime] = None
+    ) -> None:
         """
- 
-        values = await cassandra_client.execute(queries, (conversation_id,))
- 
-        messages = []
-        for value in values:
-            messages.append({
-                "id": value["message_id"],
-                "sender_id": value["sender_id"],
-                "receiver_id": value["receiver_id"],
-                "content": value["content"],
-                "created_at": value["timestamp"],
-                "conversation_id": conversation_id
-            })
-        total = len(messages)
-        offset = (page - 1) * limit
-        paginated_messages = messages[offset:offset + limit]
- 
-        messages = paginated_messages if paginated_messages else []
-        return messages, total
+        Add the writes moving the conversation to the top of both participants'
+        user_conversations_by_user partitions to a batch.
 
+        last_timestamp is part of the clustering key, so the rows written for the
+        previous message have to be deleted rather than updated in place.
 
+        Args:
+            batch (BatchStatement): Batch to add the statements to
+            conversation_id (UUID): ID of the conversation
+            sender_id (int): ID of the sender
+            receiver_id (int): ID of the receiver
+            content (str): Content of the new last message
+            created_at (datetime): Timestamp of the new last message
+            previous_timestamp (datetime): Timestamp of the previous last message, if any
+        """
+        delete_queries = await cassandra_client.prepare(_DELETE_USER_CONVERSATION)
+        insert_queries = await cassandra_client.prepare(_INSERT_USER_CONVERSATION)
 
+        # Write timestamps come from the message time, not the coordinator clock: the delete of the
+        # previous rows outranks their insert even if the older sender's batch lands last
+        write_timestamp = _micros(created_at)
 
+        # Same millisecond: the insert overwrites the row, a delete in the same batch would shadow it
+        if previous_timestamp is not None and previous_timestamp != created_at:
+            batch.add(delete_queries, (write_timestamp, sender_id, previous_timestamp, conversation_id))
+            batch.add(delete_queries, (write_timestamp, receiver_id, previous_timestamp, conversation_id))
+        batch.add(insert_queries, (sender_id, created_at, conversation_id, receiver_id, content, write_timestamp))
+        batch.add(insert_queries, (receiver_id, created_at, conversation_id, sender_id, content, write_timestamp))
 
+    @staticmethod
+    async def get_conversation_message_count(conversation_id: UUID) -> int:
+        """
+        Get the total number of messages in a conversation.
+
+        Args:
+            conversation_id (UUID): ID of the conversation
 
+        Returns:
+            int: Number of messages, read from the conversation_message_count counter
+        """
+        queries = await cassandra_client.prepare(_SELECT_MESSAGE_COUNT, _READ_CONSISTENCY)
+        values = await cassandra_client.execute(queries, (conversation_id,))
+        row = values.one()
+        return row.msg_count if row else 0
 
     @staticmethod
-    async def get_messages_before_timestamp(
-        conversation_id: int, 
-        before_timestamp: datetime, 
-        page: int = 1, 
+    async def get_conversation_messages(
+        conversation_id: UUID,
+        before: Optional[Tuple[datetime, UUID]] = None,
         limit: int = 20
-    ) -> Tuple[List[Dict[str, Any]], int]:
+    ) -> Tuple[List[MessageResponse], int, Optional[Tuple[datetime, UUID]]]:
         """
-        Get messages before a timestamp with pagination.
+        Get messages for a conversation, newest first, seeking past a clustering key.
+
+        The first page is the one chat clients open, so it is served from an
+        in-process TTL cache when possible.
  
         Args:
-            conversation_id (int): ID of the conversation
-            before_timestamp (datetime): Timestamp to filter messages
-            page (int): Page number for pagination (default: 1)
+            conversation_id (UUID): ID of the conversation
+            before (tuple): (timestamp, message_id) to return messages older than (default: newest messages)
             limit (int): Number of messages per page (default: 20)
  
         Returns:
-            tuple: (List of messages, Total count) for PaginatedMessageResponse
+            tuple: (List of MessageResponse, Total count, Key of the last row when more may follow) for PaginatedMessageResponse
         """
-        # Get total count of messages before the timestamp
-        count_queries = """
-        SELECT COUNT(*) as count FROM messages 
-        WHERE conversation_id = %s AND timestamp < %s
-        """
-        count_results = await cassandra_client.execute(count_queries, (conversation_id, before_timestamp))
-        total = count_results[0]["count"] if count_results else 0
- 
-        # Get messages before timestamp with pagination
-        queries = """
-        SELECT message_id, sender_id, receiver_id, content, timestamp
-        FROM messages
-        WHERE conversation_id = %s AND timestamp < %s
-        ORDER BY timestamp DESC
-        """
-        values = await cassandra_client.execute(queries, (conversation_id, before_timestamp))
- 
-        messages = []
-        for value in values:
-            messages.append({
-                "id": value["message_id"],
-                "sender_id": value["sender_id"],
-                "receiver_id": value["receiver_id"],
-                "content": value["content"],
-                "created_at": value["timestamp"],
-                "conversation_id": conversation_id
-            })
- 
-        total = len(messages)
-        offset = (page - 1) * limit
-        paginated_messages = messages[offset:offset + limit]
- 
-        messages = paginated_messages if paginated_messages else []
- 
-        return messages, total
+        if before is None:
+            cached = _first_page_cache.get(conversation_id, {}).get(limit)
+            if cached is not None:
+                return cached
+        generation = _write_generations.get(conversation_id, 0)
+
+        # Seek on the clustering key and let Cassandra stop reading at LIMIT
+        if before is None:
+            queries = await cassandra_client.prepare(_SELECT_MESSAGES, _READ_CONSISTENCY)
+            bucket_queries = await cassandra_client.prepare(_SELECT_MESSAGE_BUCKETS, _READ_CONSISTENCY)
+            # Every non-empty month after the first one contributes at least one row
+            bucket_params = (conversation_id, limit)
+        else:
+            queries = await cassandra_client.prepare(_SELECT_MESSAGES_BEFORE, _READ_CONSISTENCY)
+            bucket_queries = await cassandra_client.prepare(_SELECT_MESSAGE_BUCKETS_BEFORE, _READ_CONSISTENCY)
+            # The cursor's own month may have nothing left before it, so allow one more
+            bucket_params = (conversation_id, _time_bucket(before[0]), limit + 1)
+
+        async def fetch_page() -> List[Tuple]:
+            # Walk only the months that hold messages, newest first, until the page is full;
+            # usually one suffices and an exhausted conversation costs no empty-month reads
+            buckets = await cassandra_client.execute(bucket_queries, bucket_params)
+            rows = []
+            for bucket in buckets:
+                if len(rows) >= limit:
+                    break
+                if before is None:
+                    params = (conversation_id, bucket.time_bucket, limit - len(rows))
+                else:
+                    params = (conversation_id, bucket.time_bucket, *before, limit - len(rows))
+                values = await cassandra_client.execute(queries, params)
+                rows.extend(values.current_rows)
+            return rows
+
+        # The total and the page are independent reads, run them concurrently
+        total, rows = await asyncio.gather(
+            MessageModel.get_conversation_message_count(conversation_id),
+            fetch_page()
+        )
+
+        # Rows are already typed by the driver, build the responses without re-validating them
+        messages = [
+            MessageResponse.model_construct(
+                id=row.message_id,
+                sender_id=row.sender_id,
+                receiver_id=row.receiver_id,
+                content=row.content,
+                created_at=row.timestamp,
+                conversation_id=conversation_id
+            )
+            for row in rows
+        ]
+
+        # A short page means there is nothing older left to fetch
+        next_key = (messages[-1].created_at, messages[-1].id) if len(messages) == limit else None
+        # Skip caching if a message was sent while this read was in flight; the page may predate it
+        if before is None and _write_generations.get(conversation_id, 0) == generation:
+            _first_page_cache.setdefault(conversation_id, {})[limit] = (messages, total, next_key)
+        return messages, total, next_key
  
  
 class ConversationModel:
@@ -210,50 +422,60 @@ class ConversationModel:
     """
  
     @staticmethod
-    async def get_user_conversations(user_id: int, page: int = 1, limit: int = 20) -> Tuple[List[Dict[str, Any]], int]:
- 
-        query_1 = """
-        SELECT conversation_id, sender_id, receiver_id, last_timestamp, last_message
-        FROM user_conversations 
-        WHERE sender_id = %s 
-        ALLOW FILTERING       
+    async def get_user_conversations(
+        user_id: int,
+        before: Optional[Tuple[datetime, UUID]] = None,
+        limit: int = 20
+    ) -> Tuple[List[ConversationResponse], int, Optional[Tuple[datetime, UUID]]]:
         """
- 
-        query_2 = """
-        SELECT conversation_id, sender_id, receiver_id, last_timestamp, last_message
-        FROM user_conversations 
-        WHERE receiver_id = %s
-        ALLOW FILTERING
+        Get a user's conversations, most recently active first, seeking past a clustering key.
+
+        Args:
+            user_id (int): ID of the user
+            before (tuple): (last_timestamp, conversation_id) to return conversations after (default: first page)
+            limit (int): Number of conversations per page (default: 20)
+
+        Returns:
+            tuple: (List of ConversationResponse, Total count, Key of the last row when more may follow) for PaginatedConversationResponse
         """
+        # A single partition read, already clustered by last_timestamp DESC; only LIMIT rows are read
+        if before is None:
+            queries = await cassandra_client.prepare(_SELECT_USER_CONVERSATIONS, _READ_CONSISTENCY)
+            params = (user_id, limit)
+        else:
+            queries = await cassandra_client.prepare(_SELECT_USER_CONVERSATIONS_BEFORE, _READ_CONSISTENCY)
+            params = (user_id, *before, limit)
+        # A counter read, not a COUNT(*) over the tombstone-heavy inbox partition
+        count_queries = await cassandra_client.prepare(_SELECT_USER_CONVERSATION_COUNT, _READ_CONSISTENCY)
+
+        values, count_results = await asyncio.gather(
+            cassandra_client.execute(queries, params),
+            cassandra_client.execute(count_queries, (user_id,))
+        )
+        rows = values.current_rows
 
-        values1 = await cassandra_client.execute(query_2, (user_id,))
-        values = await cassandra_client.execute(query_1, (user_id,))
-        values_list = list(values)
-        values_list2 = list(values1)
-        values_list.extend(values_list2)
-        sorted(values_list, key=lambda x: x["last_timestamp"])
- 
-        logger.info(f"Values fetched: {values_list}")
- 
-        total = len(values_list)
-        offset = (page - 1) * limit
-        paginated_values = values_list[offset:offset + limit]
- 
-        conversation = []
- 
-        for values in paginated_values:
-            logger.info(f"Checking if conversation already exists: {values}")
-            conversation.append({
-                "id": values["conversation_id"],
-                "user1_id": values["sender_id"],
-                "user2_id": values["receiver_id"],
-                "last_message_at": values["last_timestamp"],
-                "last_message_content": values["last_message"]
-            }) 
- 
- 
- 
-        return conversation, total
+        # Rows are already typed by the driver, build the responses without re-validating them.
+        # An interrupted send can leave a stale row behind its conversation's newest one; keep the first.
+        conversations = []
+        seen = set()
+        for row in rows:
+            if row.conversation_id in seen:
+                continue
+            seen.add(row.conversation_id)
+            conversations.append(ConversationResponse.model_construct(
+                id=row.conversation_id,
+                user1_id=user_id,
+                user2_id=row.other_user_id,
+                last_message_at=row.last_timestamp,
+                last_message_content=row.last_message
+            ))
+        row = count_results.one()
+        total = row.conversation_count if row else 0
+        logger.debug("Fetched %d conversations for user %s", len(conversations), user_id)
+
+        # A short page means there is nothing older left to fetch; the key is the last row read, kept or not
+        next_key = (rows[-1].last_timestamp, rows[-1].conversation_id) if len(rows) == limit else None
+        return conversations, total, next_key
 
 
 
@@ -263,22 +485,12 @@ class ConversationModel:
     @staticmethod
     async def create_conversation(sender_id: int, receiver_id: int):
         try:
-           # getting the conversation id by running the counter
-            conversation_id_queries = "SELECT counter_value FROM counter WHERE counter_name = 'conversation_id'"
-            result = await cassandra_client.execute(conversation_id_queries)
-            conversation_id = result[0]["counter_value"] + 1 if result else 1
- 
-            # Update the counter
-            await cassandra_client.execute(
-                "UPDATE counter SET counter_value = counter_value + 1 WHERE counter_name = 'conversation_id'"
-            )
- 
-            created_at = datetime.now()
+            created_at = _utcnow()
+
+            # The conversation ID is a TimeUUID of the creation time
+            conversation_id = uuid_from_time(created_at)
  
-            insert_queries = """
-                            INSERT INTO conversation (conversation_id, sender_id, receiver_id, last_timestamp)
-                            VALUES (%s, %s, %s, %s)
-            """
+            insert_queries = await cassandra_client.prepare(_INSERT_CONVERSATION_PARTICIPANTS)
  
             await cassandra_client.execute(insert_queries, (conversation_id, sender_id, receiver_id, created_at))
  
@@ -299,36 +511,40 @@ class ConversationModel:
 
 
     @staticmethod
-    async def get_conversation(conversation_id: int) -> Dict[str, Any]:
+    async def get_conversation(conversation_id: UUID) -> Dict[str, Any]:
         """
-        Get a conversation by ID.
+        Get a conversation by ID, served from an in-process TTL cache when possible.
  
         Args:
-            conversation_id (int): ID of the conversation
+            conversation_id (UUID): ID of the conversation
  
         Returns:
             dict: Details of the conversation matching ConversationResponse schema
         """
-        queries = """
-                SELECT conversation_id, sender_id, receiver_id, last_timestamp, last_message
-                FROM user_conversations 
-                WHERE conversation_id = %s
-                """
+        conversation = _conversation_cache.get(conversation_id)
+        if conversation is not None:
+            return conversation
+        generation = _write_generations.get(conversation_id, 0)
+
+        queries = await cassandra_client.prepare(_SELECT_CONVERSATION, _READ_CONSISTENCY)
         values = await cassandra_client.execute(queries, (conversation_id,))
  
         if not values:
             return None
  
-        value = values[0]
- 
+        value = values.one()
  
-        return {
-            "conversation_id": value["conversation_id"],
-            "sender_id": value["sender_id"],
-            "receiver_id": value["receiver_id"],
-            "last_message_at": value["last_timestamp"],
-            "last_message_content": value["last_message"]
+        conversation = {
+            "conversation_id": value.conversation_id,
+            "sender_id": value.sender_id,
+            "receiver_id": value.receiver_id,
+            "last_message_at": value.last_timestamp,
+            "last_message_content": value.last_message
         }
+        # A message sent while this read was in flight has already cached a newer row
+        if _write_generations.get(conversation_id, 0) == generation:
+            _conversation_cache[conversation_id] = conversation
+        return conversation
 
 
 
@@ -338,68 +554,49 @@ class ConversationModel:
     async def create_or_get_conversation(user1_id: int, user2_id: int) -> Dict[str, Any]:
         """
         Get an existing conversation between two users or create a new one.
+
+        The pair is looked up in conversation_by_users under its sorted
+        (user_low, user_high) key, so either direction finds the same row.
+        Only the ID is returned, nothing else is read on a hit; use
+        get_conversation when the other fields are needed.
  
         Args:
             user1_id (int): ID of the first user
             user2_id (int): ID of the second user
  
         Returns:
-            dict: Details of the conversation matching ConversationResponse schema
+            dict: The conversation_id of the conversation
         """
- 
-        # Check if the conversation already exists
-        query_1 = """
-                SELECT conversation_id FROM conversation
-                WHERE sender_id = %s AND receiver_id = %s 
-                ALLOW FILTERING
-                """
-        values1 = await cassandra_client.execute(query_1, (user1_id, user2_id))
- 
-        query_2 = """
-                SELECT conversation_id FROM conversation
-                WHERE sender_id = %s AND receiver_id = %s 
-                ALLOW FILTERING
-                """
-        values2 = await cassandra_client.execute(query_2, (user2_id, user1_id))
-
-        for row in values1:
-            logger.info(f"Row: {row}")
-        for row in values2:
-            logger.info(f"Row: {row}")
- 
-        if values1:
-            # If conversation exists, get its details
-            return await ConversationModel.get_conversation(values1[0]["conversation_id"])
-        if values2:
-            # If conversation exists, get its details
-            return await ConversationModel.get_conversation(values2[0]["conversation_id"])
+        user_low, user_high = sorted((user1_id, user2_id))
+
+        # Check if the conversation already exists, a single partition-key read
+        queries = await cassandra_client.prepare(_SELECT_CONVERSATION_BY_USERS, _READ_CONSISTENCY)
+        values = await cassandra_client.execute(queries, (user_low, user_high))
+
+        if values:
+            return {"conversation_id": values.one().conversation_id}
  
         # If conversation doesn't exist, create a new one
-        # Get the next conversation ID
-        conversation_id_queries = "SELECT counter_value FROM counter WHERE counter_name = 'conversation_id'"
-        value = await cassandra_client.execute(conversation_id_queries)
-        conversation_id = value[0]["counter_value"] + 1 if value else 1
- 
-        # Update the counter
-        await cassandra_client.execute(
-            "UPDATE counter SET counter_value = counter_value + 1 WHERE counter_name = 'conversation_id'"
+        created_at = _utcnow()
+
+        # The conversation ID is a TimeUUID of the creation time
+        conversation_id = uuid_from_time(created_at)
+
+        # Claim the pair with a lightweight transaction so concurrent first messages share one conversation
+        claim_queries = await cassandra_client.prepare(_INSERT_CONVERSATION_BY_USERS)
+        claim = await cassandra_client.execute(claim_queries, (user_low, user_high, conversation_id))
+        if not claim.was_applied:
+            return {"conversation_id": claim.one().conversation_id}
+ 
+        # Insert into conversation table, and count the new conversation for both users exactly once
+        insert_queries = await cassandra_client.prepare(_INSERT_CONVERSATION_PARTICIPANTS)
+        increment_queries = await cassandra_client.prepare(_INCREMENT_USER_CONVERSATION_COUNT)
+        counters = BatchStatement(batch_type=BatchType.COUNTER)
+        counters.add(increment_queries, (user_low,))
+        counters.add(increment_queries, (user_high,))
+        await asyncio.gather(
+            cassandra_client.execute(insert_queries, (conversation_id, user1_id, user2_id, created_at)),
+            cassandra_client.execute(counters)
         )
  
-        created_at = datetime.now()
- 
-        # Insert into conversation table
-        insert_queries = """
-        INSERT INTO conversation (conversation_id, sender_id, receiver_id, last_timestamp)
-        VALUES (%s, %s, %s, %s)
-        """
-        await cassandra_client.execute(insert_queries, (conversation_id, user1_id, user2_id, created_at))
- 
- 
-        # Return conversation details in the format expected by ConversationResponse
-        return {
-            "conversation_id": conversation_id,
-            "sender_id": user1_id,
-            "receiver_id": user2_id,
-            "last_message_at": created_at,
-            "last_message_content": None
-        }
+        return {"conversation_id": conversation_id}
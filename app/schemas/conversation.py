@@ -1,10 +1,11 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
+from uuid import UUID
 from app.schemas.message import MessageResponse
 
 class ConversationResponse(BaseModel):
-    id: int = Field(..., description="Unique ID of the conversation")
+    id: UUID = Field(..., description="Unique TimeUUID of the conversation")
     user1_id: int = Field(..., description="ID of the first user")
     user2_id: int = Field(..., description="ID of the second user")
     last_message_at: datetime = Field(..., description="Timestamp of the last message")
@@ -14,11 +15,11 @@ class ConversationDetail(ConversationResponse):
     messages: List[MessageResponse] = Field(..., description="List of messages in conversation")
 
 class PaginatedConversationRequest(BaseModel):
-    page: int = Field(1, description="Page number for pagination")
     limit: int = Field(20, description="Number of items per page")
+    cursor: Optional[str] = Field(None, description="next_cursor of the previous page")
 
 class PaginatedConversationResponse(BaseModel):
     total: int = Field(..., description="Total number of conversations")
-    page: int = Field(..., description="Current page number")
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to fetch the next page, null on the last page")
     limit: int = Field(..., description="Number of items per page")
     data: List[ConversationResponse] = Field(..., description="List of conversations") 
\ No newline at end of file
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
+from uuid import UUID
 
 class MessageBase(BaseModel):
     content: str = Field(..., description="Content of the message")
@@ -10,19 +11,18 @@ class MessageCreate(MessageBase):
     receiver_id: int = Field(..., description="ID of the receiver")
 
 class MessageResponse(MessageBase):
-    id: int = Field(..., description="Unique ID of the message")
+    id: UUID = Field(..., description="Unique TimeUUID of the message")
     sender_id: int = Field(..., description="ID of the sender")
     receiver_id: int = Field(..., description="ID of the receiver")
     created_at: datetime = Field(..., description="Timestamp when message was created")
-    conversation_id: int = Field(..., description="ID of the conversation")
+    conversation_id: UUID = Field(..., description="ID of the conversation")
 
 class PaginatedMessageRequest(BaseModel):
-    page: int = Field(1, description="Page number for pagination")
     limit: int = Field(20, description="Number of items per page")
-    before_timestamp: Optional[datetime] = Field(None, description="Get messages before this timestamp")
+    cursor: Optional[str] = Field(None, description="next_cursor of the previous page")
 
 class PaginatedMessageResponse(BaseModel):
     total: int = Field(..., description="Total number of messages")
-    page: int = Field(..., description="Current page number")
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to fetch the next page, null on the last page")
     limit: int = Field(..., description="Number of items per page")
     data: List[MessageResponse] = Field(..., description="List of messages") 
\ No newline at end of file
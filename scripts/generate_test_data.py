@@ -6,8 +6,12 @@ import os
 import uuid
 import logging
 import random
+from itertools import combinations
 from datetime import datetime, timedelta
 from cassandra.cluster import Cluster
+from cassandra.concurrent import execute_concurrent, execute_concurrent_with_args
+from cassandra.query import BatchStatement, BatchType
+from cassandra.util import uuid_from_time
  
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,6 +25,9 @@ CASSANDRA_KEYSPACE = os.getenv("CASSANDRA_KEYSPACE", "messenger")
 NUM_USERS = 10  # Number of users to create
 NUM_CONVERSATIONS = 15  # Number of conversations to create
 MAX_MESSAGES_PER_CONVERSATION = 50  # Maximum number of messages per conversation
+CONCURRENCY = 100  # Maximum number of in-flight requests while loading
+MESSAGE_TIME_SPAN = 3600  # Messages are spread over this many seconds before now
+MESSAGES_PER_BATCH = 50  # Maximum number of messages sent in one single-partition batch
  
 def connect_to_cassandra():
     """Connect to Cassandra cluster."""
@@ -34,24 +41,37 @@ def connect_to_cassandra():
         logger.error(f"Failed to connect to Cassandra: {str(e)}")
         raise
  
-def get_next_id(session, counter_name):
+def insert_concurrently(session, query, args_list):
+    """Prepare an INSERT/UPDATE once and run it for every row in args_list with many requests in flight."""
+    prepared = session.prepare(query)
+    execute_concurrent_with_args(session, prepared, args_list, concurrency=CONCURRENCY)
+
+def insert_messages(session, message_rows):
     """
-    Get the next sequential ID from the counters table.
+    Insert messages as UNLOGGED batches grouped by partition.
+
+    Every row of a batch shares the (conversation_id, time_bucket) partition, so the
+    coordinator applies each batch as a single mutation on one replica set.
     """
-    session.execute(
+    prepared = session.prepare(
         """
-        UPDATE counter SET counter_value = counter_value + 1 WHERE counter_name = %s
-        """,
-        (counter_name,)
-    )
-    result = session.execute(
+        INSERT INTO messages (conversation_id, time_bucket, timestamp, message_id, content, sender_id, receiver_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
         """
-        SELECT counter_value FROM counter WHERE counter_name = %s
-        """,
-        (counter_name,)
     )
-    return result.one().counter_value
- 
+    rows_by_partition = {}
+    for row in message_rows:
+        rows_by_partition.setdefault(row[:2], []).append(row)
+
+    batches = []
+    for rows in rows_by_partition.values():
+        for start in range(0, len(rows), MESSAGES_PER_BATCH):
+            batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+            for row in rows[start:start + MESSAGES_PER_BATCH]:
+                batch.add(prepared, row)
+            batches.append((batch, ()))
+    execute_concurrent(session, batches, concurrency=CONCURRENCY)
+
 def generate_test_data(session):
     """
     Generate test data in Cassandra.
@@ -67,54 +87,106 @@ def generate_test_data(session):
     user_ids = list(range(1, NUM_USERS + 1))
     logger.info(f"Generated user IDs: {user_ids}")
  
+    # Rows are collected per table first and written concurrently afterwards
+    user_conversation_rows = []
+    user_conversation_by_user_rows = []
+    conversation_rows = []
+    conversation_by_users_rows = []
+    message_rows = []
+    message_count_rows = []
+    user_conversation_count_rows = []
+
     # Generate conversations
     conversations = []
-    for _ in range(NUM_CONVERSATIONS):
-        sender_id, receiver_id = random.sample(user_ids, 2)
-        conversation_id = get_next_id(session, "conversation_id")  # Get the next conversation ID
+    # Each pair of users has at most one conversation, keyed in conversation_by_users
+    for pair in random.sample(list(combinations(user_ids, 2)), NUM_CONVERSATIONS):
+        sender_id, receiver_id = random.sample(pair, 2)
         last_timestamp = datetime.utcnow()
+        # TimeUUID of the conversation creation time, before any of its messages
+        conversation_id = uuid_from_time(last_timestamp - timedelta(seconds=MESSAGE_TIME_SPAN))
         last_message = f"Last message in conversation {conversation_id}"
  
-        # Insert into user_conversations table
-        session.execute(
-            """
-            INSERT INTO user_conversations (sender_id, receiver_id, conversation_id, last_timestamp, last_message)
-            VALUES (%s, %s, %s, %s, %s)
-            """,
-            (sender_id, receiver_id, conversation_id, last_timestamp, last_message)
-        )
- 
-        # Insert into conversations table
-        session.execute(
-            """
-            INSERT INTO conversation (conversation_id, sender_id, receiver_id, last_timestamp)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (conversation_id, sender_id, receiver_id, last_timestamp)
-        )
- 
-        conversations.append((conversation_id, sender_id, receiver_id))
-        logger.info(f"Created conversation: {conversation_id} between {sender_id} and {receiver_id}")
+        user_conversation_rows.append((sender_id, receiver_id, conversation_id, last_timestamp, last_message))
+        # One row per participant in user_conversations_by_user
+        for user_id, other_user_id in ((sender_id, receiver_id), (receiver_id, sender_id)):
+            user_conversation_by_user_rows.append((user_id, last_timestamp, conversation_id, other_user_id, last_message))
+        conversation_rows.append((conversation_id, sender_id, receiver_id, last_timestamp))
+        # The lookup row lives under the sorted user pair
+        conversation_by_users_rows.append((min(pair), max(pair), conversation_id))
+        user_conversation_count_rows.extend([(sender_id,), (receiver_id,)])
+
+        conversations.append((conversation_id, sender_id, receiver_id, last_timestamp))
  
     # Generate messages for each conversation
-    for conversation_id, sender_id, receiver_id in conversations:
+    for conversation_id, sender_id, receiver_id, last_timestamp in conversations:
         num_messages = random.randint(1, MAX_MESSAGES_PER_CONVERSATION)
         for _ in range(num_messages):
-            message_id = get_next_id(session, "message_id")  # Get the next message ID
-            timestamp = datetime.utcnow() - timedelta(seconds=random.randint(0, 3600))
+            timestamp = last_timestamp - timedelta(seconds=random.randint(0, MESSAGE_TIME_SPAN))
+            message_id = uuid_from_time(timestamp)  # TimeUUID of the message timestamp
             content = f"Message {message_id} in conversation {conversation_id}"
+            time_bucket = timestamp.year * 100 + timestamp.month  # Month partition, as yyyymm
+            message_rows.append((conversation_id, time_bucket, timestamp, message_id, content, sender_id, receiver_id))
+
+        # Keep the per-conversation message count in sync with the inserted messages
+        message_count_rows.append((num_messages, conversation_id))
+
+    insert_concurrently(
+        session,
+        """
+        INSERT INTO user_conversations (sender_id, receiver_id, conversation_id, last_timestamp, last_message)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        user_conversation_rows
+    )
+    insert_concurrently(
+        session,
+        """
+        INSERT INTO user_conversations_by_user (user_id, last_timestamp, conversation_id, other_user_id, last_message)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        user_conversation_by_user_rows
+    )
+    insert_concurrently(
+        session,
+        """
+        INSERT INTO conversation (conversation_id, sender_id, receiver_id, last_timestamp)
+        VALUES (?, ?, ?, ?)
+        """,
+        conversation_rows
+    )
+    insert_concurrently(
+        session,
+        """
+        INSERT INTO conversation_by_users (user_low, user_high, conversation_id)
+        VALUES (?, ?, ?)
+        """,
+        conversation_by_users_rows
+    )
+    insert_messages(session, message_rows)
+    # Index the non-empty months of each conversation, which is what reads walk
+    insert_concurrently(
+        session,
+        """
+        INSERT INTO message_buckets (conversation_id, time_bucket) VALUES (?, ?)
+        """,
+        list({row[:2] for row in message_rows})
+    )
+    insert_concurrently(
+        session,
+        """
+        UPDATE conversation_message_count SET msg_count = msg_count + ? WHERE conversation_id = ?
+        """,
+        message_count_rows
+    )
+    insert_concurrently(
+        session,
+        """
+        UPDATE user_conversation_count SET conversation_count = conversation_count + 1 WHERE user_id = ?
+        """,
+        user_conversation_count_rows
+    )
  
-            # Insert into messages table
-            session.execute(
-                """
-                INSERT INTO messages (conversation_id, timestamp, message_id, content, sender_id, receiver_id)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                """,
-                (conversation_id, timestamp, message_id, content, sender_id, receiver_id)
-            )
-        logger.info(f"Generated {num_messages} messages for conversation {conversation_id}")
- 
-    logger.info(f"Generated {NUM_CONVERSATIONS} conversations with messages")
+    logger.info(f"Generated {NUM_CONVERSATIONS} conversations with {len(message_rows)} messages")
     logger.info(f"User IDs range from 1 to {NUM_USERS}")
     logger.info("Use these IDs for testing the API endpoints")
  
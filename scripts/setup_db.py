@@ -2,32 +2,176 @@
 Script to initialize Cassandra keyspace and tables for the Messenger application.
 """
 import os
+import re
 import time
 import logging
-from cassandra.cluster import Cluster
-from cassandra.auth import PlainTextAuthProvider
  
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
  
 CASSANDRA_HOST = os.getenv("CASSANDRA_HOST", "localhost")
 CASSANDRA_PORT = int(os.getenv("CASSANDRA_PORT", "9042"))
 CASSANDRA_KEYSPACE = os.getenv("CASSANDRA_KEYSPACE", "messenger")
+CASSANDRA_LOCAL_DC = os.getenv("CASSANDRA_LOCAL_DC", "datacenter1")
+
+# Connection retries while waiting for Cassandra to start
+CONNECT_ATTEMPTS = 20
+INITIAL_RETRY_DELAY = 0.25  # Seconds, doubled after every failed attempt
+MAX_RETRY_DELAY = 4.0
+ 
+# Tables earlier versions of this script created that are no longer used; dropped on every run
+RETIRED_TABLES = ["counter"]
+
+# Table DDL run by create_tables, as (name, create) per table
+TABLES = [
+    (
+        "messages",
+        f"""
+        CREATE TABLE {CASSANDRA_KEYSPACE}.messages (
+            conversation_id TIMEUUID,
+            time_bucket INT,
+            timestamp TIMESTAMP,
+            message_id TIMEUUID,
+            content TEXT,
+            sender_id INT,
+            receiver_id INT,
+            PRIMARY KEY ((conversation_id, time_bucket), timestamp, message_id)
+        ) WITH CLUSTERING ORDER BY (timestamp DESC, message_id DESC);
+        """
+    ),
+    (
+        "message_buckets",
+        f"""
+        CREATE TABLE {CASSANDRA_KEYSPACE}.message_buckets (
+            conversation_id TIMEUUID,
+            time_bucket INT,
+            PRIMARY KEY (conversation_id, time_bucket)
+        ) WITH CLUSTERING ORDER BY (time_bucket DESC);
+        """
+    ),
+    (
+        "conversation_message_count",
+        f"""
+        CREATE TABLE {CASSANDRA_KEYSPACE}.conversation_message_count (
+            conversation_id TIMEUUID,
+            msg_count COUNTER,
+            PRIMARY KEY (conversation_id)
+        );
+        """
+    ),
+    (
+        "user_conversation_count",
+        f"""
+        CREATE TABLE {CASSANDRA_KEYSPACE}.user_conversation_count (
+            user_id INT,
+            conversation_count COUNTER,
+            PRIMARY KEY (user_id)
+        );
+        """
+    ),
+    (
+        "user_conversations",
+        f"""
+        CREATE TABLE {CASSANDRA_KEYSPACE}.user_conversations (
+            sender_id INT,
+            receiver_id INT,
+            conversation_id TIMEUUID,
+            last_timestamp TIMESTAMP,
+            last_message TEXT,
+            PRIMARY KEY (conversation_id)
+        );
+        """
+    ),
+    (
+        "user_conversations_by_user",
+        f"""
+        CREATE TABLE {CASSANDRA_KEYSPACE}.user_conversations_by_user (
+            user_id INT,
+            last_timestamp TIMESTAMP,
+            conversation_id TIMEUUID,
+            other_user_id INT,
+            last_message TEXT,
+            PRIMARY KEY (user_id, last_timestamp, conversation_id)
+        ) WITH CLUSTERING ORDER BY (last_timestamp DESC, conversation_id DESC);
+        """
+    ),
+    (
+        "conversation",
+        f"""
+        CREATE TABLE {CASSANDRA_KEYSPACE}.conversation (
+            conversation_id TIMEUUID,
+            sender_id INT,
+            receiver_id INT,
+            last_timestamp TIMESTAMP,
+            PRIMARY KEY (conversation_id, sender_id));
+        """
+    ),
+    (
+        "conversation_by_users",
+        f"""
+        CREATE TABLE {CASSANDRA_KEYSPACE}.conversation_by_users (
+            user_low INT,
+            user_high INT,
+            conversation_id TIMEUUID,
+            PRIMARY KEY ((user_low, user_high))
+        );
+        """
+    ),
+]
+ 
+def build_cluster():
+    """Build a Cluster with every setting the driver would otherwise negotiate or default given explicitly."""
+    # The driver is imported on first use so importing this module stays cheap
+    from cassandra import ConsistencyLevel
+    from cassandra.cluster import Cluster, ExecutionProfile, EXEC_PROFILE_DEFAULT
+    from cassandra.policies import DCAwareRoundRobinPolicy, DefaultRetryPolicy, TokenAwarePolicy
+
+    profile = ExecutionProfile(
+        load_balancing_policy=TokenAwarePolicy(DCAwareRoundRobinPolicy(local_dc=CASSANDRA_LOCAL_DC)),
+        retry_policy=DefaultRetryPolicy(),
+        consistency_level=ConsistencyLevel.LOCAL_ONE,
+        request_timeout=30
+    )
+    return Cluster(
+        [CASSANDRA_HOST],
+        port=CASSANDRA_PORT,
+        protocol_version=4,
+        compression=False,
+        connect_timeout=2,
+        # Don't block for the default 10s on every DDL if the schema is slow to agree
+        max_schema_agreement_wait=5,
+        # Setup doesn't need the driver to re-parse the whole schema after every DDL; it refreshes explicitly
+        schema_metadata_enabled=False,
+        token_metadata_enabled=False,
+        execution_profiles={EXEC_PROFILE_DEFAULT: profile}
+    )
  
 def wait_for_cassandra():
-    """Wait for Cassandra to be ready before proceeding."""
+    """Wait for Cassandra to be ready, returning the connected cluster and its session."""
+    from cassandra import AuthenticationFailed, OperationTimedOut
+    from cassandra.cluster import NoHostAvailable
+    from cassandra.connection import ConnectionException
+
     logger.info("Waiting for Cassandra to be ready...")
     cluster = None
+    delay = INITIAL_RETRY_DELAY
  
-    for _ in range(10):  # Try 10 times
+    for _ in range(CONNECT_ATTEMPTS):
         try:
-            cluster = Cluster([CASSANDRA_HOST], port=CASSANDRA_PORT)
+            cluster = build_cluster()
             session = cluster.connect()
             logger.info("Cassandra is ready!")
-            return cluster
-        except Exception as e:
-            logger.warning(f"Cassandra not ready yet: {str(e)}")
-            time.sleep(5)  # Wait 5 seconds before trying again
+            return cluster, session
+        except (NoHostAvailable, OperationTimedOut, ConnectionException) as e:
+            # Only an unreachable node is worth retrying; anything else fails straight away
+            cluster.shutdown()
+            # The control connection reports per-host failures, bad credentials included, as NoHostAvailable
+            errors = getattr(e, "errors", None) or {}
+            if any(isinstance(error, AuthenticationFailed) for error in errors.values()):
+                raise
+            logger.warning(f"Cassandra not ready yet, retrying in {delay:.2f}s: {str(e)}")
+            # Back off exponentially so a fast-starting node is picked up quickly
+            time.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY)
  
     logger.error("Failed to connect to Cassandra after multiple attempts.")
     raise Exception("Could not connect to Cassandra")
@@ -39,15 +183,57 @@ def create_keyspace(session):
     This is where students will define the keyspace configuration.
     """
     logger.info(f"Creating keyspace {CASSANDRA_KEYSPACE} if it doesn't exist...")
-    query = """
-    CREATE KEYSPACE IF NOT EXISTS {} WITH REPLICATION = {{
+    # Keyspace names can't be bound as parameters, they have to be part of the statement text
+    query = f"""
+    CREATE KEYSPACE IF NOT EXISTS {CASSANDRA_KEYSPACE} WITH REPLICATION = {{
         'class': 'SimpleStrategy',
         'replication_factor': 1
-    }}""".format(CASSANDRA_KEYSPACE)
-    session.execute(query)
+    }}"""
+    session.execute(query, host=session.cluster.get_control_connection_host())
  
     logger.info(f"Keyspace {CASSANDRA_KEYSPACE} is ready.")
  
+def ddl_signature(create):
+    """Columns, partition key and clustering order declared by a CREATE TABLE statement."""
+    columns = {name: cql_type.lower() for name, cql_type in re.findall(r"^\s*(\w+) (\w+),$", create, re.M)}
+    key = re.search(r"PRIMARY KEY \(((?:\([^)]*\)|[^()])*)\)", create).group(1)
+    if key.startswith("("):
+        partition, _, clustering = key[1:].partition(")")
+    else:
+        partition, _, clustering = key.partition(",")
+    order = re.search(r"CLUSTERING ORDER BY \(([^)]*)\)", create)
+    descending = {
+        name for name, direction in (item.split() for item in order.group(1).split(","))
+        if direction.upper() == "DESC"
+    } if order else set()
+    return (
+        columns,
+        tuple(name.strip() for name in partition.split(",") if name.strip()),
+        tuple((name.strip(), name.strip() in descending) for name in clustering.split(",") if name.strip())
+    )
+ 
+def table_signature(table):
+    """The same signature as ddl_signature, read from the driver's metadata of an existing table."""
+    return (
+        {column.name: column.cql_type for column in table.columns.values()},
+        tuple(column.name for column in table.partition_key),
+        tuple((column.name, column.is_reversed) for column in table.clustering_key)
+    )
+ 
+def execute_all(session, statements):
+    """
+    Send statements concurrently and wait until every one of them has completed.
+
+    Every statement goes to the same coordinator, the control connection host,
+    so the schema changes are applied and agreed on from a single node.
+    """
+    from cassandra.query import SimpleStatement
+
+    host = session.cluster.get_control_connection_host()
+    futures = [session.execute_async(SimpleStatement(statement), host=host) for statement in statements]
+    for future in futures:
+        future.result()
+ 
 def create_tables(session):
     """
     Create the tables for the application.
@@ -60,70 +246,42 @@ def create_tables(session):
     """
     logger.info("Creating tables...")
 
-    session.execute("""DROP TABLE IF EXISTS messenger.counter;""")
-    session.execute("""
-    CREATE TABLE IF NOT EXISTS counter (
-        counter_name TEXT,
-        counter_value COUNTER,
-        PRIMARY KEY (counter_name)
-    );
-    """)
-    logger.info("Created counters table")
- 
-    session.execute("""DROP TABLE IF EXISTS messenger.messages;""")
-    session.execute("""
-    CREATE TABLE IF NOT EXISTS messages (
-        conversation_id INT,
-        timestamp TIMESTAMP,
-        message_id INT,
-        content TEXT,
-        sender_id INT,
-        receiver_id INT,
-        PRIMARY KEY (conversation_id, timestamp, message_id)
-    ) WITH CLUSTERING ORDER BY (timestamp DESC, message_id ASC);
-    """)
-    logger.info("Created messages table")
+    # Schema metadata is disabled on the setup cluster; load it once, tables included, to compare against
+    session.cluster.refresh_schema_metadata()
+    keyspace = session.cluster.metadata.keyspaces.get(CASSANDRA_KEYSPACE)
+    existing = keyspace.tables if keyspace else {}
 
-    session.execute("""DROP TABLE IF EXISTS messenger.user_conversations;""")
-    session.execute("""
-    CREATE TABLE IF NOT EXISTS user_conversations (
-        sender_id INT,
-        receiver_id INT,
-        conversation_id INT,
-        last_timestamp TIMESTAMP,
-        last_message TEXT,
-        PRIMARY KEY (conversation_id)
-    );
-    """)
-    logger.info("Created user_conversations table")
- 
-    session.execute("""DROP TABLE IF EXISTS messenger.conversation;""")
-    session.execute("""
-    CREATE TABLE IF NOT EXISTS conversation (
-        conversation_id INT,
-        sender_id INT,
-        receiver_id INT,
-        last_timestamp TIMESTAMP,
-        PRIMARY KEY (conversation_id, sender_id));
-    """)
-    logger.info("Created conversation table")
- 
+    # A table that already has the wanted schema only needs emptying; the rest are recreated
+    resets = [f"DROP TABLE IF EXISTS {CASSANDRA_KEYSPACE}.{name};" for name in RETIRED_TABLES]
+    creates = []
+    for name, create in TABLES:
+        table = existing.get(name)
+        if table is not None and table_signature(table) == ddl_signature(create):
+            resets.append(f"TRUNCATE {CASSANDRA_KEYSPACE}.{name};")
+        else:
+            resets.append(f"DROP TABLE IF EXISTS {CASSANDRA_KEYSPACE}.{name};")
+            creates.append(create)
+
+    # Independent DDL statements are sent together: one wait for the DROP/TRUNCATEs, one for the CREATEs
+    execute_all(session, resets)
+    execute_all(session, creates)
+    logger.info(f"Reset {len(TABLES) - len(creates)} tables, created {len(creates)} tables")
+
+    # Refresh the driver's view of the schema once, instead of after every statement
+    session.cluster.refresh_schema_metadata(max_schema_agreement_wait=10)
     logger.info("Tables created successfully.")
  
 def main():
     """Initialize the database."""
     logger.info("Starting Cassandra initialization...")
  
-    # Wait for Cassandra to be ready
-    cluster = wait_for_cassandra()
+    # Wait for Cassandra to be ready; the session that answered is reused for the setup
+    cluster, session = wait_for_cassandra()
  
     try:
-        # Connect to the server
-        session = cluster.connect()
- 
         # Create keyspace and tables
+        # Table DDL names the keyspace itself, so the session never needs a USE round-trip
         create_keyspace(session)
-        session.set_keyspace(CASSANDRA_KEYSPACE)
         create_tables(session)
  
         logger.info("Cassandra initialization completed successfully.")
@@ -135,4 +293,5 @@ def main():
             cluster.shutdown()
  
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     main() 